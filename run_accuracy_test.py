@@ -6,10 +6,27 @@ Provides real empirical evidence for translation accuracy
 
 import os
 import sys
+import argparse
 import json
+import math
+import re
 import time
+import asyncio
+from collections import Counter
 from datetime import datetime
-from openai import OpenAI
+try:
+    import orjson  # native JSON encoder; optional
+except ImportError:
+    orjson = None
+
+try:
+    from rapidfuzz import fuzz  # C++ edit-distance metrics; optional
+except ImportError:
+    fuzz = None
+
+from translate_to_tagalog import (
+    MAX_CONCURRENCY, call_with_backoff, close_async_client, get_async_client, max_output_tokens, run_batch
+)
 
 # Test cases with reference translations
 TEST_CASES = [
@@ -50,38 +67,139 @@ TEST_CASES = [
     }
 ]
 
-def calculate_similarity(text1, text2):
-    """Calculate basic text similarity"""
-    words1 = set(text1.lower().split())
-    words2 = set(text2.lower().split())
+# System instruction shared by every test case
+SYSTEM_INSTRUCTION = """Ikaw ay isang propesyonal na tagasalin sa Tagalog (Filipino).
+Layunin: tumpak at natural na pagsasalin sa Tagalog.
+Mga panuntunan:
+- Gamitin ang natural at malinaw na Tagalog
+- Panatilihin ang mga pangalan, numero, at teknikal na termino
+- Iwasan ang literal na salin; gumamit ng katumbas na idyoma
+- Huwag magdagdag o magbawas ng impormasyon
+- Output: Isang kumpletong salin sa Tagalog"""
+
+# Multilingual sentence-embedding model used when --embeddings is given
+EMBEDDING_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+EMBEDDING_BATCH_SIZE = 32
+_embedder = None
+_reference_embeddings = None
+_reference_rows = {tc['id']: i for i, tc in enumerate(TEST_CASES)}
+
+def load_embedder():
+    """Load the embedding model and pre-encode every reference translation once"""
+    global _embedder, _reference_embeddings
+    from sentence_transformers import SentenceTransformer
+    
+    # Runs on the GPU automatically when one is available
+    _embedder = SentenceTransformer(EMBEDDING_MODEL)
+    _reference_embeddings = _embedder.encode(
+        [tc['reference'] for tc in TEST_CASES],
+        batch_size=EMBEDDING_BATCH_SIZE,
+        normalize_embeddings=True,
+        convert_to_tensor=True,
+        show_progress_bar=False
+    )
+
+def apply_embedding_scores(results):
+    """Replace semantic scores with embedding similarity, encoding all translations in one batch"""
+    from sentence_transformers import util
     
-    if not words1 or not words2:
+    scored = [r for r in results if not r['errors']]
+    if not scored:
+        return
+    
+    # One encode call for every translation (and every sample) keeps the batches full
+    texts, rows, owners = [], [], []
+    for i, result in enumerate(scored):
+        for text in result.get('samples', [result['translated']]):
+            texts.append(text)
+            rows.append(_reference_rows[result['test_id']])
+            owners.append(i)
+    embeddings = _embedder.encode(
+        texts,
+        batch_size=EMBEDDING_BATCH_SIZE,
+        normalize_embeddings=True,
+        convert_to_tensor=True,
+        show_progress_bar=False
+    )
+    # Embeddings are unit length, so the row-wise dot product is the cosine
+    cosines = util.pairwise_dot_score(embeddings, _reference_embeddings[rows]).tolist()
+    
+    totals = [0.0] * len(scored)
+    counts = [0] * len(scored)
+    for owner, cosine in zip(owners, cosines):
+        totals[owner] += min(max(cosine * 100, 0.0), 100.0)
+        counts[owner] += 1
+    
+    for result, total, count in zip(scored, totals, counts):
+        semantic_score = total / count
+        overall_score = (semantic_score * 0.4 + result['term_preservation'] * 0.3 + result['grammar_score'] * 0.3)
+        result['semantic_score'] = round(semantic_score, 1)
+        result['overall_score'] = round(overall_score, 1)
+
+def word_cosine(counts1, counts2):
+    """Cosine similarity of two word-count Counters, in [0, 1]"""
+    # Walk the smaller Counter and look words up in the larger one
+    if len(counts1) > len(counts2):
+        counts1, counts2 = counts2, counts1
+    dot = sum(count * counts2[word] for word, count in counts1.items())
+    # math.hypot computes each vector norm in C
+    return dot / (math.hypot(*counts1.values()) * math.hypot(*counts2.values()))
+
+# Name of the lexical similarity recorded in the report
+LEXICAL_METRIC = 'word_cosine' if fuzz is None else 'word_cosine+token_set_ratio'
+
+def calculate_similarity(text1, text2, counts2=None):
+    """Calculate basic text similarity (cosine of word-frequency vectors)
+    
+    counts2 may be the precomputed word Counter of text2, in which case text2
+    must already be lowercased.
+    """
+    text1 = text1.lower()
+    
+    # Counters keep repeated words, which a plain word set would collapse
+    counts1 = Counter(text1.split())
+    if counts2 is None:
+        text2 = text2.lower()
+        counts2 = Counter(text2.split())
+    
+    if not counts1 or not counts2:
         return 0.0
     
-    intersection = words1.intersection(words2)
-    union = words1.union(words2)
+    cosine = word_cosine(counts1, counts2) * 100
+    
+    if fuzz is None:
+        return cosine
     
-    return len(intersection) / len(union) * 100
+    # Average in rapidfuzz's edit-distance score: it gives partial credit for
+    # near-miss spellings and affixes that exact word matching scores as zero
+    return (cosine + fuzz.token_set_ratio(text1, text2)) / 2
 
-def check_term_preservation(translated_text, expected_terms):
-    """Check if expected terms are preserved"""
+def check_term_preservation(translated_text, expected_terms, lowercased=False):
+    """Check if expected terms are preserved
+    
+    Pass lowercased=True when expected_terms are already lowercase.
+    """
     if not expected_terms:
         return 100.0
     
-    preserved = 0
-    for term in expected_terms:
-        if term.lower() in translated_text.lower():
-            preserved += 1
+    # Lowercase the translation once rather than once per term
+    lowered = translated_text.lower()
+    if not lowercased:
+        expected_terms = [term.lower() for term in expected_terms]
+    preserved = sum(1 for term in expected_terms if term in lowered)
     
     return (preserved / len(expected_terms)) * 100
 
+# Basic Tagalog particles, matched as whole words only
+_PARTICLE_RE = re.compile(r"\b(?:ang|ng|sa|ay|na|at|o)\b", re.IGNORECASE)
+
 def check_grammar_indicators(translated_text):
     """Check for basic Tagalog grammar indicators"""
     score = 100.0
     
-    # Check for basic Tagalog particles
-    particles = ['ang', 'ng', 'sa', 'ay', 'na', 'at', 'o']
-    found_particles = sum(1 for particle in particles if particle in translated_text.lower())
+    # Check for basic Tagalog particles: one case-insensitive scan that only
+    # yields particle matches, so the full text is never lowercased or tokenized
+    found_particles = len({m.group(0).lower() for m in _PARTICLE_RE.finditer(translated_text)})
     
     # Basic grammar score based on particle usage
     if found_particles >= 3:
@@ -95,7 +213,154 @@ def check_grammar_indicators(translated_text):
     
     return score
 
-def run_accuracy_test():
+def build_request_body(test_case, samples=1):
+    """Build the chat completion request for a test case"""
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": SYSTEM_INSTRUCTION},
+            {"role": "user", "content": f"Isalin ang sumusunod sa Tagalog: {test_case['english']}"}
+        ],
+        "temperature": 0.2,
+        # Sized from the input so short cases don't reserve a fixed 500 tokens
+        "max_tokens": max_output_tokens("gpt-4o-mini", test_case['english']),
+        # Multiple samples come from one request via n= rather than k separate
+        # requests: the prompt is billed once and only one RPM slot is used
+        "n": samples
+    }
+
+# Reference-side scoring inputs are fixed, so lowercase and count them once at
+# import instead of on every scored translation and sample
+_REFERENCE_FEATURES = {
+    test_case['id']: (
+        test_case['reference'].lower(),
+        Counter(test_case['reference'].lower().split()),
+        [term.lower() for term in test_case['expected_terms']]
+    )
+    for test_case in TEST_CASES
+}
+
+def score_result(test_case, translated_text, processing_time):
+    """Score a translation against its test case"""
+    # Calculate accuracy metrics
+    reference_lower, reference_counts, expected_lower = _REFERENCE_FEATURES[test_case['id']]
+    semantic_score = calculate_similarity(translated_text, reference_lower, reference_counts)
+    term_preservation = check_term_preservation(translated_text, expected_lower, lowercased=True)
+    grammar_score = check_grammar_indicators(translated_text)
+    
+    # Overall score (weighted average)
+    overall_score = (semantic_score * 0.4 + term_preservation * 0.3 + grammar_score * 0.3)
+    
+    return {
+        'test_id': test_case['id'],
+        'category': test_case['category'],
+        'english': test_case['english'],
+        'reference': test_case['reference'],
+        'translated': translated_text,
+        'semantic_score': round(semantic_score, 1),
+        'term_preservation': round(term_preservation, 1),
+        'grammar_score': round(grammar_score, 1),
+        'overall_score': round(overall_score, 1),
+        'processing_time': round(processing_time, 2),
+        'errors': []
+    }
+
+def score_samples(test_case, translations, processing_time):
+    """Score every sampled translation of a test case and average the metrics"""
+    scored = [score_result(test_case, text, processing_time) for text in translations]
+    result = scored[0]
+    if len(scored) > 1:
+        for key in ('semantic_score', 'term_preservation', 'grammar_score', 'overall_score'):
+            result[key] = round(sum(r[key] for r in scored) / len(scored), 1)
+        result['samples'] = list(translations)
+    return result
+
+def error_result(test_case, error, processing_time):
+    """Build a zero-score result for a failed test case"""
+    return {
+        'test_id': test_case['id'],
+        'category': test_case['category'],
+        'english': test_case['english'],
+        'reference': test_case['reference'],
+        'translated': '',
+        'semantic_score': 0.0,
+        'term_preservation': 0.0,
+        'grammar_score': 0.0,
+        'overall_score': 0.0,
+        'processing_time': processing_time,
+        'errors': [str(error)]
+    }
+
+# Recorded instead of scores when a translation hit max_tokens (finish_reason
+# "length"), since scoring a cut-off translation would look like a bad one
+TRUNCATED_ERROR = "translation truncated at max_tokens"
+
+async def run_one(client, sem, test_case, samples=1):
+    """Translate and score a single test case"""
+    async with sem:
+        start_time = time.perf_counter()
+        try:
+            response = await call_with_backoff(
+                lambda: client.chat.completions.create(**build_request_body(test_case, samples))
+            )
+            if any(choice.finish_reason == "length" for choice in response.choices):
+                return error_result(test_case, TRUNCATED_ERROR, time.perf_counter() - start_time)
+            translations = [choice.message.content.strip() for choice in response.choices]
+            return score_samples(test_case, translations, time.perf_counter() - start_time)
+        except Exception as e:
+            return error_result(test_case, e, time.perf_counter() - start_time)
+
+async def run_all(samples=1):
+    """Run every test case concurrently, returning results in TEST_CASES order"""
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    client = get_async_client(MAX_CONCURRENCY)
+    try:
+        tasks = [run_one(client, sem, test_case, samples) for test_case in TEST_CASES]
+        return await asyncio.gather(*tasks)
+    finally:
+        await close_async_client()
+
+async def run_all_batch(samples=1):
+    """Run every test case as a single Batch API job, returning results in TEST_CASES order"""
+    bodies = {test_case['id']: build_request_body(test_case, samples) for test_case in TEST_CASES}
+    start_time = time.perf_counter()
+    try:
+        responses = await run_batch(get_async_client(), "/v1/chat/completions", bodies)
+    except Exception as e:
+        # The batch couldn't be submitted, failed, expired or was cancelled; every case failed with it
+        processing_time = time.perf_counter() - start_time
+        return [error_result(test_case, e, processing_time) for test_case in TEST_CASES]
+    finally:
+        await close_async_client()
+    # Every request shares the batch turnaround, so that is its processing time
+    processing_time = time.perf_counter() - start_time
+    
+    results = []
+    for test_case in TEST_CASES:
+        body = responses.get(test_case['id'])
+        if body is None:
+            results.append(error_result(test_case, "no response in batch output", processing_time))
+            continue
+        try:
+            if any(choice.get('finish_reason') == "length" for choice in body['choices']):
+                results.append(error_result(test_case, TRUNCATED_ERROR, processing_time))
+                continue
+            translations = [choice['message']['content'].strip() for choice in body['choices']]
+            results.append(score_samples(test_case, translations, processing_time))
+        except Exception as e:
+            results.append(error_result(test_case, e, processing_time))
+    return results
+
+def save_report(report, path):
+    """Write the report as indented UTF-8 JSON"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+def run_accuracy_test(batch=False, samples=1, embeddings=False):
     """Run the actual accuracy test"""
     print("Tagalog Translation Accuracy Test")
     print("=" * 40)
@@ -107,92 +372,39 @@ def run_accuracy_test():
         print("Please set your API key: export OPENAI_API_KEY='your-key-here'")
         return None
     
-    # Initialize OpenAI client
-    client = OpenAI()
+    if embeddings:
+        try:
+            load_embedder()
+        except ImportError:
+            print("ERROR: --embeddings requires sentence-transformers")
+            print("Please install it: pip install sentence-transformers")
+            return None
     
-    results = []
-    total_start_time = time.time()
+    total_start_time = time.perf_counter()
     
     print(f"Testing {len(TEST_CASES)} cases...")
     print()
     
-    for i, test_case in enumerate(TEST_CASES, 1):
-        print(f"Test {i}/{len(TEST_CASES)}: {test_case['id']} ({test_case['category']})")
-        
-        start_time = time.time()
+    if batch:
+        results = asyncio.run(run_all_batch(samples))
+    else:
+        # All requests are in flight at once; wall time is the slowest call, not the sum
+        results = asyncio.run(run_all(samples))
+    
+    if embeddings:
+        apply_embedding_scores(results)
+    
+    for i, result in enumerate(results, 1):
+        print(f"Test {i}/{len(TEST_CASES)}: {result['test_id']} ({result['category']})")
         
-        try:
-            # Create system instruction
-            system_instruction = f"""Ikaw ay isang propesyonal na tagasalin sa Tagalog (Filipino).
-Layunin: tumpak at natural na pagsasalin sa Tagalog.
-Mga panuntunan:
-- Gamitin ang natural at malinaw na Tagalog
-- Panatilihin ang mga pangalan, numero, at teknikal na termino
-- Iwasan ang literal na salin; gumamit ng katumbas na idyoma
-- Huwag magdagdag o magbawas ng impormasyon
-- Output: Isang kumpletong salin sa Tagalog"""
-
-            # Perform translation
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_instruction},
-                    {"role": "user", "content": f"Isalin ang sumusunod sa Tagalog: {test_case['english']}"}
-                ],
-                temperature=0.2,
-                max_tokens=500
-            )
-            
-            translated_text = response.choices[0].message.content.strip()
-            processing_time = time.time() - start_time
-            
-            # Calculate accuracy metrics
-            semantic_score = calculate_similarity(translated_text, test_case['reference'])
-            term_preservation = check_term_preservation(translated_text, test_case['expected_terms'])
-            grammar_score = check_grammar_indicators(translated_text)
-            
-            # Overall score (weighted average)
-            overall_score = (semantic_score * 0.4 + term_preservation * 0.3 + grammar_score * 0.3)
-            
-            result = {
-                'test_id': test_case['id'],
-                'category': test_case['category'],
-                'english': test_case['english'],
-                'reference': test_case['reference'],
-                'translated': translated_text,
-                'semantic_score': round(semantic_score, 1),
-                'term_preservation': round(term_preservation, 1),
-                'grammar_score': round(grammar_score, 1),
-                'overall_score': round(overall_score, 1),
-                'processing_time': round(processing_time, 2),
-                'errors': []
-            }
-            
-            results.append(result)
-            
-            print(f"  Semantic: {semantic_score:.1f}% | Terms: {term_preservation:.1f}% | Grammar: {grammar_score:.1f}%")
-            print(f"  Overall: {overall_score:.1f}% | Time: {processing_time:.2f}s")
-            print()
-            
-        except Exception as e:
-            print(f"  ERROR: {str(e)}")
-            result = {
-                'test_id': test_case['id'],
-                'category': test_case['category'],
-                'english': test_case['english'],
-                'reference': test_case['reference'],
-                'translated': '',
-                'semantic_score': 0.0,
-                'term_preservation': 0.0,
-                'grammar_score': 0.0,
-                'overall_score': 0.0,
-                'processing_time': time.time() - start_time,
-                'errors': [str(e)]
-            }
-            results.append(result)
-            print()
-    
-    total_time = time.time() - total_start_time
+        if result['errors']:
+            print(f"  ERROR: {result['errors'][0]}")
+        else:
+            print(f"  Semantic: {result['semantic_score']:.1f}% | Terms: {result['term_preservation']:.1f}% | Grammar: {result['grammar_score']:.1f}%")
+            print(f"  Overall: {result['overall_score']:.1f}% | Time: {result['processing_time']:.2f}s")
+        print()
+    
+    total_time = time.perf_counter() - total_start_time
     
     # Calculate overall metrics
     successful_results = [r for r in results if not r['errors']]
@@ -215,7 +427,10 @@ Mga panuntunan:
             'failed_tests': len(results) - len(successful_results),
             'total_time': round(total_time, 2),
             'model_used': 'gpt-4o-mini',
-            'temperature': 0.2
+            'temperature': 0.2,
+            'batch_api': batch,
+            'samples_per_test': samples,
+            'semantic_metric': EMBEDDING_MODEL if embeddings else LEXICAL_METRIC
         },
         'accuracy_metrics': {
             'semantic_fidelity': round(avg_semantic, 1),
@@ -261,12 +476,21 @@ Mga panuntunan:
             print(f"  {category.title()}: {data['average_score']:.1f}% ({data['count']} tests)")
     
     # Save detailed report
-    with open('empirical_accuracy_report.json', 'w', encoding='utf-8') as f:
-        json.dump(report, f, indent=2, ensure_ascii=False)
+    save_report(report, 'empirical_accuracy_report.json')
     
     print(f"\nDetailed report saved to: empirical_accuracy_report.json")
     
     return report
 
 if __name__ == "__main__":
-    run_accuracy_test()
+    parser = argparse.ArgumentParser(description="Run the Tagalog translation accuracy test.")
+    parser.add_argument("--batch", action="store_true",
+                        help="Submit all test cases as one OpenAI Batch API job (about half the cost; may take up to 24h).")
+    parser.add_argument("--embeddings", action="store_true",
+                        help=f"Score semantic fidelity with {EMBEDDING_MODEL} embeddings instead of word overlap.")
+    parser.add_argument("--samples", type=int, default=1,
+                        help="Translations sampled per test case via the API's n parameter; scores are averaged.")
+    args = parser.parse_args()
+    if args.samples < 1:
+        parser.error("--samples must be at least 1")
+    run_accuracy_test(batch=args.batch, samples=args.samples, embeddings=args.embeddings)
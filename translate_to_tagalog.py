@@ -19,40 +19,96 @@ Env:
 import os
 import sys
 import argparse
+import asyncio
+import hashlib
+import importlib.util
+import json
+import random
 import re
-from typing import List, Iterable
+import tempfile
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Iterable, Optional, Tuple
 
 # ------- Config -------
 DEFAULT_MODEL = "gpt-4.1-mini"   # quality/cost balanced; change to a bigger model if desired
 MAX_WORDS_PER_CHUNK = 4000
 TEMPERATURE = 0.2                 # low temp for faithful translation
+MAX_CONCURRENCY = 8               # in-flight API requests; keeps us under RPM/TPM limits
+MAX_RETRIES = 8                   # attempts per request on rate-limit/timeout errors
+BACKOFF_CAP = 60.0                # seconds; upper bound for a single backoff sleep
+BATCH_POLL_INTERVAL = 30.0        # seconds between Batch API status checks
+MAX_OUTPUT_TOKENS = 16384         # hard cap on tokens generated per request
+OUTPUT_TOKEN_RATIO = 1.6          # Tagalog output runs ~1.3-1.5x the English token count
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "translate_to_tagalog")
 # ----------------------
 
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+_WORD_RE = re.compile(r"\S+")
+_PARA_RE = re.compile(r"\n{2,}")
+_SENT_RE = re.compile(r"(?<=[.!?])\s+")
+
 
 def word_count(text: str) -> int:
-    return len(re.findall(r"\S+", text))
+    # Count matches without materializing a list of every word
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
+
+@lru_cache(maxsize=None)
+def _token_encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # Encodings are downloaded on first use; estimate instead if that fails
+        return None
+
+
+def count_tokens(model: str, text: str) -> int:
+    enc = _token_encoding(model)
+    if enc is None:
+        # Without tiktoken, estimate ~1.3 tokens per English word
+        return int(word_count(text) * 1.3) + 1
+    return len(enc.encode(text))
+
 
+def max_output_tokens(model: str, text: str) -> int:
+    """Output budget for translating `text`: tight enough to bound decoding, loose enough not to truncate."""
+    return min(MAX_OUTPUT_TOKENS, int(count_tokens(model, text) * OUTPUT_TOKEN_RATIO) + 64)
 
-def split_into_paragraphs(text: str) -> List[str]:
+
+def split_into_paragraphs(text: str) -> List[Tuple[str, int]]:
+    """Split text into (paragraph, word count) pairs."""
     # Keep paragraph boundaries; normalize Windows newlines.
     text = text.replace("\r\n", "\n")
     # Split on two or more newlines to keep structure
-    parts = re.split(r"\n{2,}", text.strip())
-    return [p.strip() for p in parts if p.strip()]
+    parts = _PARA_RE.split(text.strip())
+    # Count words while splitting so chunking never rescans a paragraph
+    paras = []
+    for p in parts:
+        n_words = len(p.split())
+        if n_words:
+            paras.append((p.strip(), n_words))
+    return paras
 
 
 def chunk_by_words(text: str, max_words: int = MAX_WORDS_PER_CHUNK) -> List[str]:
     """Greedy pack paragraphs into chunks up to max_words."""
     paras = split_into_paragraphs(text)
     chunks, buff, count = [], [], 0
-    for p in paras:
-        wc = word_count(p)
+    for p, wc in paras:
         if wc > max_words:
             # If a single paragraph is too long, split by sentences.
-            sentences = re.split(r'(?<=[.!?])\s+', p)
+            sentences = _SENT_RE.split(p)
             cur, cur_wc = [], 0
             for s in sentences:
-                swc = word_count(s)
+                swc = len(s.split())
                 if cur_wc + swc > max_words and cur:
                     chunks.append("\n".join(buff + [" ".join(cur)]))
                     buff, count, cur, cur_wc = [], 0, [], 0
@@ -102,21 +158,250 @@ Mga panuntunan:
 Output: **Isang kumpletong salin sa Tagalog**; panatilihin ang talata/format ng orihinal."""
     
 
+def build_translation_input(chunk: str, system_instruction: str) -> str:
+    return f"{system_instruction}\n\n---\n\nIsalin ang sumusunod na teksto sa Tagalog (Filipino):\n\n{chunk}\n"
+
+
+def extract_output_text(response) -> str:
+    # In the new SDK, output_text provides the text aggregate conveniently.
+    return getattr(response, "output_text", None) or response.output[0].content[0].text
+
+
+def build_response_request(model: str, chunk: str, system_instruction: str) -> dict:
+    """Request body for one chunk; shared by direct calls and Batch API jobs."""
+    return {
+        "model": model,
+        "temperature": TEMPERATURE,
+        "max_output_tokens": max_output_tokens(model, chunk),
+        "input": build_translation_input(chunk, system_instruction),
+    }
+
+
+def is_truncated(status: Optional[str], label: str) -> bool:
+    """Warn when a response stopped early (e.g. at max_output_tokens)."""
+    if status != "incomplete":
+        return False
+    print(f"WARNING: translation of {label} is incomplete and may be truncated", file=sys.stderr)
+    return True
+
+
+def extract_output_text_json(body: dict) -> str:
+    """Same as extract_output_text, for a raw /v1/responses body from a batch output file."""
+    return "".join(
+        part.get("text", "")
+        for item in body.get("output", [])
+        if item.get("type") == "message"
+        for part in item.get("content", [])
+        if part.get("type") == "output_text"
+    )
+
+
 def translate_chunk(client, model: str, chunk: str, system_instruction: str) -> str:
     # Use Responses API (Python SDK)
     # Docs: https://platform.openai.com/docs/api-reference/responses
-    response = client.responses.create(
-        model=model,
-        temperature=TEMPERATURE,
-        input=f"{system_instruction}\n\n---\n\nIsalin ang sumusunod na teksto sa Tagalog (Filipino):\n\n{chunk}\n",
+    response = client.responses.create(**build_response_request(model, chunk, system_instruction))
+    return extract_output_text(response)
+
+
+def cache_key(model: str, chunk: str, system_instruction: str) -> str:
+    """Hash of what determines the translation, so any change to model, prompt or temperature misses the cache.
+
+    max_output_tokens is left out: it is derived from the chunk, and depends on whether tiktoken is installed.
+    """
+    request = {
+        "model": model,
+        "temperature": TEMPERATURE,
+        "input": build_translation_input(chunk, system_instruction),
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def cache_get(cache_dir: Optional[str], key: str) -> Optional[str]:
+    if not cache_dir:
+        return None
+    try:
+        with open(os.path.join(cache_dir, key), "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def cache_put(cache_dir: Optional[str], key: str, text: str) -> None:
+    if not cache_dir:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write to a temp file and rename so readers never see a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=f".{key}.", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, os.path.join(cache_dir, key))
+
+
+async def request_translation(client, model: str, chunk: str, system_instruction: str) -> Tuple[str, bool]:
+    """One uncached AsyncOpenAI translation; returns (text, truncated) and warns when truncated."""
+    response = await client.responses.create(**build_response_request(model, chunk, system_instruction))
+    truncated = is_truncated(getattr(response, "status", None), f"chunk starting {chunk[:40]!r}")
+    return extract_output_text(response), truncated
+
+
+async def translate_chunk_async(client, model: str, chunk: str, system_instruction: str,
+                                cache_dir: Optional[str] = None) -> str:
+    """Async variant of translate_chunk for use with AsyncOpenAI; reuses cached translations when cache_dir is set."""
+    key = cache_key(model, chunk, system_instruction)
+    cached = cache_get(cache_dir, key)
+    if cached is not None:
+        return cached
+    translated, truncated = await request_translation(client, model, chunk, system_instruction)
+    # Never cache a truncated translation; a rerun should retry it
+    if not truncated:
+        cache_put(cache_dir, key, translated)
+    return translated
+
+
+_client = None
+
+
+def get_async_client(max_connections: int = MAX_CONCURRENCY):
+    """Process-wide AsyncOpenAI client, created on first use.
+
+    Every request shares one keep-alive connection pool sized to the concurrency
+    limit, so TCP/TLS handshakes are paid once per connection rather than per call.
+    HTTP/2 multiplexing is used when the optional h2 package is installed.
+    """
+    global _client
+    if _client is None:
+        import httpx
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        http2 = importlib.util.find_spec("h2") is not None
+        _client = AsyncOpenAI(http_client=DefaultAsyncHttpxClient(limits=limits, http2=http2))
+    return _client
+
+
+async def close_async_client() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.close()
+
+
+async def call_with_backoff(request, max_tries: int = MAX_RETRIES):
+    """Await request(), retrying rate-limit and timeout errors with jittered exponential backoff."""
+    from openai import APITimeoutError, RateLimitError
+
+    for attempt in range(1, max_tries + 1):
+        try:
+            return await request()
+        except (RateLimitError, APITimeoutError):
+            if attempt == max_tries:
+                raise
+            await asyncio.sleep(random.uniform(0, min(BACKOFF_CAP, 2 ** attempt)))
+
+
+async def iter_translated_chunks(client, model: str, chunks: List[str], system_instruction: str,
+                                 concurrency: int = MAX_CONCURRENCY,
+                                 cache_dir: Optional[str] = None) -> AsyncIterator[str]:
+    """Translate chunks concurrently (at most `concurrency` in flight), yielding them in order.
+
+    Each translation is yielded as soon as it and every chunk before it are done,
+    so callers can write output incrementally instead of holding the whole document.
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def guarded(idx: int, chunk: str) -> Tuple[int, str]:
+        async with sem:
+            translated = await call_with_backoff(
+                lambda: translate_chunk_async(client, model, chunk, system_instruction, cache_dir)
+            )
+        return idx, translated
+
+    # Start the longest chunks first (LPT scheduling) so that, when there are more
+    # chunks than slots, a long chunk is not left running alone at the end
+    order = sorted(range(len(chunks)), key=lambda i: word_count(chunks[i]), reverse=True)
+    tasks: List[Optional[asyncio.Future]] = [None] * len(chunks)
+    for idx in order:
+        tasks[idx] = asyncio.ensure_future(guarded(idx, chunks[idx]))
+    ready: Dict[int, str] = {}
+    next_idx = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            idx, translated = await next_done
+            tasks[idx] = None  # drop our reference so the text is freed once written
+            ready[idx] = translated
+            while next_idx in ready:
+                yield ready.pop(next_idx)
+                next_idx += 1
+    finally:
+        for task in tasks:
+            if task is not None:
+                task.cancel()
+
+
+async def run_batch(client, endpoint: str, bodies: Dict[str, dict],
+                    poll_interval: float = BATCH_POLL_INTERVAL) -> Dict[str, dict]:
+    """Submit `bodies` (custom_id -> request body) as one Batch API job and wait for it.
+
+    Returns custom_id -> response body for every request that succeeded; failed
+    requests are simply absent, so callers decide how to report them.
+    Docs: https://platform.openai.com/docs/guides/batch
+    """
+    lines = "\n".join(
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": endpoint, "body": body}, ensure_ascii=False)
+        for custom_id, body in bodies.items()
     )
-    # In the new SDK, output_text provides the text aggregate conveniently.
-    return getattr(response, "output_text", None) or response.output[0].content[0].text
+    batch_file = await client.files.create(file=("batch.jsonl", lines.encode("utf-8")), purpose="batch")
+    batch = await client.batches.create(input_file_id=batch_file.id, endpoint=endpoint, completion_window="24h")
+    print(f"Submitted batch {batch.id} ({len(bodies)} requests)", file=sys.stderr)
+
+    while batch.status not in BATCH_TERMINAL_STATUSES:
+        await asyncio.sleep(poll_interval)
+        batch = await client.batches.retrieve(batch.id)
+
+    if batch.status != "completed":
+        raise RuntimeError(f"Batch {batch.id} ended with status '{batch.status}'")
+
+    results: Dict[str, dict] = {}
+    if batch.output_file_id:
+        content = await client.files.content(batch.output_file_id)
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            response = row.get("response") or {}
+            if response.get("status_code") == 200:
+                results[row["custom_id"]] = response["body"]
+    return results
+
+
+async def translate_chunks_batch(client, model: str, chunks: List[str], system_instruction: str,
+                                 cache_dir: Optional[str] = None) -> List[str]:
+    """Translate chunks through one Batch API job; only cache misses are submitted."""
+    keys = [cache_key(model, chunk, system_instruction) for chunk in chunks]
+    outputs = [cache_get(cache_dir, key) for key in keys]
+    pending = {f"chunk_{idx}": idx for idx, cached in enumerate(outputs) if cached is None}
+    if not pending:
+        return outputs
+
+    bodies = {
+        custom_id: build_response_request(model, chunks[idx], system_instruction)
+        for custom_id, idx in pending.items()
+    }
+    results = await run_batch(client, "/v1/responses", bodies)
+    missing = [custom_id for custom_id in pending if custom_id not in results]
+    if missing:
+        raise RuntimeError(f"batch returned no translation for {', '.join(missing)}")
+
+    for custom_id, idx in pending.items():
+        outputs[idx] = extract_output_text_json(results[custom_id])
+        if not is_truncated(results[custom_id].get("status"), custom_id):
+            cache_put(cache_dir, keys[idx], outputs[idx])
+    return outputs
 
 
 def main():
     try:
-        from openai import OpenAI  # official SDK
+        import openai  # official SDK
     except Exception as e:
         print("Please install the official OpenAI Python SDK:\n  pip install openai", file=sys.stderr)
         sys.exit(2)
@@ -128,7 +413,16 @@ def main():
     parser.add_argument("--formal", action="store_true", help="Use more formal Tagalog tone.")
     parser.add_argument("--glossary", default="", help="Comma-separated terms to keep in original form.")
     parser.add_argument("--max-words", type=int, default=MAX_WORDS_PER_CHUNK, help="Max words per chunk.")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY,
+                        help=f"Max chunks translated in parallel (default: {MAX_CONCURRENCY}).")
+    parser.add_argument("--batch", action="store_true",
+                        help="Submit all chunks as one OpenAI Batch API job (about half the cost; may take up to 24h).")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Directory for cached chunk translations (default: {DEFAULT_CACHE_DIR}).")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the cache and re-translate every chunk.")
     args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
 
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
@@ -151,22 +445,51 @@ def main():
     glossary = [t.strip() for t in args.glossary.split(",")] if args.glossary else []
     sys_instruction = build_system_instruction(args.formal, glossary)
     chunks = chunk_by_words(text, max_words=args.max_words)
+    cache_dir = None if args.no_cache else args.cache_dir
 
-    client = OpenAI()
-    outputs: List[str] = []
+    def _write(out, idx: int, translated: str) -> None:
+        # Same layout as joining all chunks with blank lines, without building the joined text
+        if idx:
+            out.write("\n\n")
+        out.write(translated)
 
-    for idx, chunk in enumerate(chunks, 1):
-        translated = translate_chunk(client, args.model, chunk, sys_instruction)
-        outputs.append(translated)
+    async def _run(out) -> None:
+        client = get_async_client(args.concurrency)
+        try:
+            if args.batch:
+                translations = await translate_chunks_batch(client, args.model, chunks, sys_instruction, cache_dir)
+                for idx, translated in enumerate(translations):
+                    _write(out, idx, translated)
+                return
 
-    final_text = "\n\n".join(outputs)
+            idx = 0
+            async for translated in iter_translated_chunks(
+                client, args.model, chunks, sys_instruction, args.concurrency, cache_dir
+            ):
+                _write(out, idx, translated)
+                idx += 1
+        finally:
+            await close_async_client()
 
-    # Write output
-    if args.output:
-        with open(args.output, "w", encoding="utf-8") as f:
-            f.write(final_text)
-    else:
-        sys.stdout.write(final_text)
+    # Write output as chunks complete
+    try:
+        if args.output:
+            # Stream into a temp file beside the output and rename it on success,
+            # so a failed run never leaves a partial or truncated output file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(args.output)),
+                                            prefix=f".{os.path.basename(args.output)}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    asyncio.run(_run(f))
+                os.replace(tmp_path, args.output)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        else:
+            asyncio.run(_run(sys.stdout))
+    except RuntimeError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":